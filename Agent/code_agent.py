@@ -2,15 +2,71 @@
 代码生成 Agent - 使用原生 OpenAI 接口集成数据库工具
 不依赖 LangChain/LangGraph，轻量级实现
 """
-import os
 import json
-from typing import List, Dict, Any, Callable
-from dotenv import load_dotenv
+import asyncio
+import functools
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Callable, Optional
 from openai import OpenAI
+from .config import Config, get_config
 from .tools.database_tool import get_db_tool
 
-# 加载环境变量
-load_dotenv()
+
+@functools.lru_cache(maxsize=None)
+def _get_client(api_key: str, base_url: str) -> OpenAI:
+    """
+    获取 OpenAI 客户端
+
+    相同 (api_key, base_url) 的 Agent 共享同一个客户端及其 HTTP 连接池，
+    避免每次创建 Agent 都重新建立 TCP/TLS 连接。客户端是线程安全的。
+    """
+    return OpenAI(api_key=api_key, base_url=base_url)
+
+
+@dataclass
+class PromptBuffer:
+    """
+    对话消息缓冲区
+
+    按 "固定系统提示词 → 已提交历史 → 当前轮次" 的顺序组织消息，
+    已提交的消息只追加、不修改，保证每次请求的前缀字节稳定，
+    从而命中服务端（DeepSeek / OpenAI）的提示词前缀缓存。
+    """
+    static_system: str = ""
+    committed: List[Dict] = field(default_factory=list)
+    pending: List[Dict] = field(default_factory=list)
+
+    def append(self, message: Dict):
+        """追加一条当前轮次的消息"""
+        self.pending.append(message)
+
+    def commit(self):
+        """当前轮次完成，将其消息按原顺序并入已提交历史"""
+        self.committed.extend(self.pending)
+        self.pending = []
+
+    def build_messages(self) -> List[Dict]:
+        """构建发送给 LLM 的完整消息列表"""
+        system = [{"role": "system", "content": self.static_system}] if self.static_system else []
+        return system + self.committed + self.pending
+
+    def compact(self, count: int, summary: str):
+        """
+        用一条摘要消息替换已提交历史中最早的 count 条消息
+
+        Args:
+            count: 被替换的消息条数
+            summary: 摘要内容
+        """
+        self.committed = [
+            {"role": "system", "content": f"以下是之前对话的摘要：\n{summary}"}
+        ] + self.committed[count:]
+
+    def clear(self):
+        """清空对话历史（保留系统提示词）"""
+        self.committed = []
+        self.pending = []
 
 
 class SimpleAgent:
@@ -19,17 +75,42 @@ class SimpleAgent:
     使用 OpenAI Function Calling 自动调用工具
     """
 
-    def __init__(self, api_key: str = None, base_url: str = None):
+    # 单轮并发执行工具调用的最大线程数
+    MAX_TOOL_WORKERS = 8
+
+    # 工具结果折叠：每轮保留最近几条完整结果，以及参与折叠的最小长度
+    KEEP_RECENT_TOOL_RESULTS = 2
+    MASK_MIN_LENGTH = 500
+
+    # 历史压缩：估算 token 超过预算的该比例时触发摘要
+    COMPACT_THRESHOLD = 0.7
+
+    # 历史压缩使用的摘要提示词
+    SUMMARY_PROMPT = (
+        "请压缩以下对话历史，保留用户的目标、已得出的结论以及工具返回的关键事实。"
+        "表名、字段名、数值和 ID 等必须原样保留，不要改写。只输出摘要正文。"
+    )
+
+    def __init__(
+        self,
+        api_key: str = None,
+        base_url: str = None,
+        system_prompt: Optional[str] = None,
+        config: Optional[Config] = None
+    ):
         """
         初始化 Agent
 
         Args:
             api_key: OpenAI API Key (默认从环境变量读取)
             base_url: API Base URL (默认从环境变量读取)
+            system_prompt: 固定的系统提示词（作为每次请求的稳定前缀）
+            config: Agent 配置，默认使用启动时加载的全局配置
         """
-        # 优先使用 DEEPSEEK_API_KEY，如果没有则使用 API_KEY
-        api_key = api_key or os.getenv("DEEPSEEK_API_KEY") or os.getenv("API_KEY")
-        base_url = base_url or os.getenv("DEEPSEEK_API_URL", "https://api.deepseek.com/v1")
+        self.config = config or get_config()
+
+        api_key = api_key or self.config.api_key
+        base_url = base_url or self.config.base_url
 
         if not api_key:
             raise ValueError(
@@ -37,11 +118,8 @@ class SimpleAgent:
                 "示例: DEEPSEEK_API_KEY=sk-xxxxxxxxxxxxx"
             )
 
-        # 初始化 OpenAI 客户端
-        self.client = OpenAI(
-            api_key=api_key,
-            base_url=base_url
-        )
+        # 获取（共享的）OpenAI 客户端
+        self.client = _get_client(api_key, base_url)
 
         print(f"  ✓ API Key: {api_key[:10]}...{api_key[-4:]}")
         print(f"  ✓ Base URL: {base_url}")
@@ -49,8 +127,35 @@ class SimpleAgent:
         # 工具注册表
         self.tools: Dict[str, Callable] = {}
 
+        # 工具 Schema 缓存与 名称 -> 函数 的分发表（注册工具时更新）
+        self._tools_schema_cache: Optional[tuple] = None
+        self._tool_functions: Dict[str, Callable] = {}
+
         # 对话历史
-        self.messages: List[Dict] = []
+        self.buffer = PromptBuffer(static_system=system_prompt or "")
+
+        # 历史压缩：始终保留最近的消息条数，以及估算的 token 预算
+        self._max_history = 20
+        self._token_budget = 8000
+
+        # 被折叠的工具结果的完整内容（tool_call_id -> 结果字符串）
+        self._tool_store: Dict[str, str] = {}
+
+        self.register_tool(
+            name="fetch_tool_result",
+            func=self._fetch_tool_result,
+            description="获取之前被折叠的工具调用结果的完整内容。",
+            parameters={
+                "type": "object",
+                "properties": {
+                    "tool_call_id": {
+                        "type": "string",
+                        "description": "被折叠结果中给出的 id"
+                    }
+                },
+                "required": ["tool_call_id"]
+            }
+        )
 
         print(f"✓ Agent 初始化完成")
 
@@ -81,11 +186,204 @@ class SimpleAgent:
                 }
             }
         }
+        self._tool_functions[name] = func
+        self._tools_schema_cache = None
         print(f"  ✓ 注册工具: {name}")
 
-    def get_tools_schema(self) -> List[Dict]:
-        """获取所有工具的 Schema（用于发送给 LLM）"""
-        return [tool["schema"] for tool in self.tools.values()]
+    @property
+    def messages(self) -> List[Dict]:
+        """当前完整的对话消息列表"""
+        return self.buffer.build_messages()
+
+    def get_tools_schema(self) -> tuple:
+        """获取所有工具的 Schema（用于发送给 LLM，注册后只构建一次）"""
+        if self._tools_schema_cache is None:
+            self._tools_schema_cache = tuple(tool["schema"] for tool in self.tools.values())
+        return self._tools_schema_cache
+
+    def _fetch_tool_result(self, tool_call_id: str) -> str:
+        """返回被折叠的工具结果的完整内容"""
+        if tool_call_id not in self._tool_store:
+            return f"错误: 未找到工具结果 {tool_call_id}"
+        return self._tool_store[tool_call_id]
+
+    def _mask_tool_results(self):
+        """
+        折叠当前轮次中较早的大体积工具结果
+
+        每次 LLM 调用返回后执行：LLM 已经看过这些结果，后续请求中只保留一条
+        简短引用，完整内容可以通过 fetch_tool_result 取回。
+        最近的 KEEP_RECENT_TOOL_RESULTS 条结果保持原样。
+        """
+        tool_messages = [m for m in self.buffer.pending if m["role"] == "tool"]
+        if self.KEEP_RECENT_TOOL_RESULTS:
+            tool_messages = tool_messages[:-self.KEEP_RECENT_TOOL_RESULTS]
+
+        for message in tool_messages:
+            content = message["content"]
+            if len(content) < self.MASK_MIN_LENGTH:
+                continue
+            tool_call_id = message["tool_call_id"]
+            self._tool_store[tool_call_id] = content
+            message["content"] = (
+                f"<tool_result id={tool_call_id} name={message['name']} len={len(content)}> "
+                f"结果已折叠，如需完整内容请调用 fetch_tool_result(\"{tool_call_id}\")"
+            )
+
+    @staticmethod
+    def _estimate_tokens(messages: List[Dict]) -> int:
+        """粗略估算消息列表的 token 数（按约 4 个字符 1 个 token）"""
+        return len(json.dumps(messages, ensure_ascii=False, default=str)) // 4
+
+    def _compact_history(self, verbose: bool = False):
+        """
+        历史过长时，将较早的消息压缩为一条摘要
+
+        最近的 self._max_history 条已提交消息保持原样；
+        当前轮次（尚未提交）的消息不参与压缩。
+        """
+        messages = self.buffer.build_messages()
+        if self._estimate_tokens(messages) <= self._token_budget * self.COMPACT_THRESHOLD:
+            return
+
+        committed = self.buffer.committed
+        cut = len(committed) - self._max_history
+        # 不能把工具结果与发起它的助手消息拆开
+        while cut > 0 and committed[cut]["role"] == "tool":
+            cut -= 1
+        if cut <= 0:
+            return
+
+        try:
+            response = self.client.chat.completions.create(
+                model=self.config.model,
+                messages=[
+                    {"role": "system", "content": self.SUMMARY_PROMPT},
+                    {
+                        "role": "user",
+                        "content": json.dumps(committed[:cut], ensure_ascii=False, default=str)
+                    }
+                ]
+            )
+            summary = response.choices[0].message.content
+        except Exception as e:
+            if verbose:
+                print(f"  ⚠️  历史压缩失败，保留原始历史: {str(e)}")
+            return
+
+        self.buffer.compact(cut, summary)
+        if verbose:
+            print(f"  🗜  已将 {cut} 条历史消息压缩为摘要")
+
+    def _execute_tool_call(self, function_name: str, raw_arguments: str) -> tuple:
+        """
+        执行单个工具调用（在线程池中运行）
+
+        Args:
+            function_name: 工具名称
+            raw_arguments: LLM 生成的 JSON 格式参数
+
+        Returns:
+            (参数, 原始结果, 结果字符串, 是否出错)
+        """
+        arguments = {}
+
+        try:
+            arguments = json.loads(raw_arguments or "{}")
+
+            func = self._tool_functions.get(function_name)
+            if func is None:
+                result = f"错误: 未知工具 {function_name}"
+            else:
+                result = func(**arguments)
+
+            # 转换结果为紧凑的 JSON 字符串（不缩进以节省 token；按键排序，相同结果字节一致，利于提示词缓存）
+            if isinstance(result, dict):
+                result_str = json.dumps(result, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+            else:
+                result_str = str(result)
+
+            return arguments, result, result_str, False
+
+        except Exception as e:
+            result_str = f"工具执行错误: {str(e)}"
+            return arguments, result_str, result_str, True
+
+    def _stream_completion(self, executor: ThreadPoolExecutor) -> tuple:
+        """
+        流式调用 LLM，边接收边拼装回复内容与工具调用
+
+        工具调用的参数一旦拼装成完整的 JSON 就立即提交到线程池执行，
+        让数据库查询与剩余 token 的生成同时进行。
+
+        Args:
+            executor: 用于执行工具调用的线程池
+
+        Returns:
+            (回复内容, 工具调用列表, 与工具调用一一对应的 Future 列表)
+        """
+        stream = self.client.chat.completions.create(
+            model=self.config.model,
+            messages=self.buffer.build_messages(),
+            tools=self.get_tools_schema() if self.tools else None,
+            stream=True
+        )
+
+        content_parts: List[str] = []
+        tool_calls: List[Dict] = []
+        futures: Dict[int, Future] = {}
+
+        def dispatch(index: int, force: bool = False):
+            """参数完整时提交工具调用；force=True 时无论参数是否完整都提交"""
+            if index in futures:
+                return
+            function = tool_calls[index]["function"]
+            if not force:
+                try:
+                    json.loads(function["arguments"])
+                except json.JSONDecodeError:
+                    return
+            futures[index] = executor.submit(
+                self._execute_tool_call, function["name"], function["arguments"]
+            )
+
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+
+            if delta.content:
+                content_parts.append(delta.content)
+
+            # 工具调用以增量形式返回，按 index 合并各片段
+            for delta_call in delta.tool_calls or []:
+                while len(tool_calls) <= delta_call.index:
+                    tool_calls.append({
+                        "id": "",
+                        "type": "function",
+                        "function": {"name": "", "arguments": ""}
+                    })
+                tool_call = tool_calls[delta_call.index]
+
+                if delta_call.id:
+                    tool_call["id"] = delta_call.id
+                if delta_call.function:
+                    if delta_call.function.name:
+                        tool_call["function"]["name"] += delta_call.function.name
+                    if delta_call.function.arguments:
+                        tool_call["function"]["arguments"] += delta_call.function.arguments
+                        if delta_call.function.arguments.rstrip().endswith("}"):
+                            dispatch(delta_call.index)
+
+        # 流结束后提交剩余的工具调用（例如无参数的工具）
+        for index, tool_call in enumerate(tool_calls):
+            # 没有收到参数片段时补为空对象，该消息会在后续请求中原样发回，"" 不是合法的 JSON
+            if not tool_call["function"]["arguments"]:
+                tool_call["function"]["arguments"] = "{}"
+            dispatch(index, force=True)
+
+        content = "".join(content_parts) or None
+        return content, tool_calls, [futures[i] for i in range(len(tool_calls))]
 
     def run(
         self,
@@ -110,7 +408,7 @@ class SimpleAgent:
             }
         """
         # 添加用户消息
-        self.messages.append({
+        self.buffer.append({
             "role": "user",
             "content": user_message
         })
@@ -127,88 +425,80 @@ class SimpleAgent:
             if verbose:
                 print(f"\n[迭代 {iteration + 1}]")
 
-            # 调用 LLM
-            response = self.client.chat.completions.create(
-                model=os.getenv("LLM_MODEL", "deepseek-chat"),
-                messages=self.messages,
-                tools=self.get_tools_schema() if self.tools else None
-            )
-
-            message = response.choices[0].message
+            # 历史过长时先压缩，控制每轮请求的 token 数
+            self._compact_history(verbose)
 
-            # 保存助手回复到历史
-            self.messages.append({
-                "role": "assistant",
-                "content": message.content,
-                "tool_calls": message.tool_calls
-            })
+            # 流式调用 LLM，工具调用在参数完整后即开始执行
+            with ThreadPoolExecutor(max_workers=self.MAX_TOOL_WORKERS) as executor:
+                content, tool_calls, futures = self._stream_completion(executor)
 
-            # 情况 1: LLM 想调用工具
-            if message.tool_calls:
-                if verbose:
-                    print(f"  💭 LLM 决定调用 {len(message.tool_calls)} 个工具")
+                # LLM 已经看过此前的工具结果，折叠较早的大体积结果，避免在后续迭代中重复发送
+                self._mask_tool_results()
 
-                # 执行每个工具调用
-                for tool_call in message.tool_calls:
-                    function_name = tool_call.function.name
-                    arguments = json.loads(tool_call.function.arguments)
+                # 保存助手回复到历史
+                assistant_message = {"role": "assistant", "content": content}
+                if tool_calls:
+                    assistant_message["tool_calls"] = tool_calls
+                self.buffer.append(assistant_message)
 
+                # 情况 1: LLM 想调用工具
+                if tool_calls:
                     if verbose:
-                        print(f"     → 调用: {function_name}")
-                        print(f"     → 参数: {json.dumps(arguments, ensure_ascii=False)}")
-
-                    # 执行工具
-                    try:
-                        if function_name not in self.tools:
-                            result = f"错误: 未知工具 {function_name}"
-                        else:
-                            result = self.tools[function_name]["function"](**arguments)
-
-                        # 转换结果为字符串
-                        if isinstance(result, dict):
-                            result_str = json.dumps(result, ensure_ascii=False, indent=2)
+                        print(f"  💭 LLM 决定调用 {len(tool_calls)} 个工具")
+                        for tool_call in tool_calls:
+                            print(f"     → 调用: {tool_call['function']['name']}")
+                            print(f"     → 参数: {tool_call['function']['arguments']}")
+
+                    # 按原始顺序收集结果，保证消息历史顺序稳定
+                    for tool_call, future in zip(tool_calls, futures):
+                        function_name = tool_call["function"]["name"]
+                        arguments, result, result_str, error = future.result()
+
+                        if error:
+                            if verbose:
+                                print(f"     ✗ 错误: {result_str}")
                         else:
-                            result_str = str(result)
-
-                        if verbose:
-                            print(f"     ← 返回: {result_str[:100]}...")
-
-                        # 记录工具调用
-                        tool_calls_history.append({
+                            if verbose:
+                                print(f"     ← 返回: {result_str[:100]}...")
+
+                            # 记录工具调用
+                            tool_calls_history.append({
+                                "name": function_name,
+                                "args": arguments,
+                                "result": result
+                            })
+
+                        # 将工具结果添加到消息历史
+                        self.buffer.append({
+                            "role": "tool",
+                            "tool_call_id": tool_call["id"],
                             "name": function_name,
-                            "args": arguments,
-                            "result": result
+                            "content": result_str
                         })
 
-                    except Exception as e:
-                        result = f"工具执行错误: {str(e)}"
-                        if verbose:
-                            print(f"     ✗ 错误: {result}")
-
-                    # 将工具结果添加到消息历史
-                    self.messages.append({
-                        "role": "tool",
-                        "tool_call_id": tool_call.id,
-                        "name": function_name,
-                        "content": result_str
-                    })
+                    continue
 
-            # 情况 2: LLM 完成任务，返回最终回复
-            else:
-                if verbose:
-                    print(f"\n✅ 完成！")
-                    print(f"{'='*60}")
-                    print(f"最终回复:\n{message.content}")
-                    print(f"{'='*60}")
-
-                return {
-                    "success": True,
-                    "final_response": message.content,
-                    "tool_calls": tool_calls_history,
-                    "iterations": iteration + 1
-                }
+            # 情况 2: LLM 完成任务，本轮消息并入已提交历史
+            self.buffer.commit()
+
+            if verbose:
+                print(f"\n✅ 完成！")
+                print(f"{'='*60}")
+                print(f"最终回复:\n{content}")
+                print(f"{'='*60}")
+
+            return {
+                "success": True,
+                "final_response": content,
+                "tool_calls": tool_calls_history,
+                "iterations": iteration + 1
+            }
+
+        # 达到最大迭代次数：同样折叠后并入已提交历史，过长时压缩
+        self._mask_tool_results()
+        self.buffer.commit()
+        self._compact_history(verbose)
 
-        # 达到最大迭代次数
         return {
             "success": False,
             "error": "达到最大迭代次数",
@@ -216,12 +506,35 @@ class SimpleAgent:
             "tool_calls": tool_calls_history
         }
 
+    async def arun(
+        self,
+        user_message: str,
+        max_iterations: int = 10,
+        verbose: bool = True
+    ) -> Dict[str, Any]:
+        """
+        run() 的异步版本，供 FastAPI 等异步调用方使用
+
+        在工作线程中执行 run()，不阻塞事件循环；LLM 流式输出与
+        数据库工具调用仍由 run() 内部的线程池并发执行。
+        参数与返回值同 run()。
+        """
+        return await asyncio.to_thread(self.run, user_message, max_iterations, verbose)
+
     def reset(self):
         """清空对话历史"""
-        self.messages = []
+        self.buffer.clear()
+        self._tool_store.clear()
         print("✓ 对话历史已清空")
 
 
+# 代码生成 Agent 的系统提示词（固定不变，作为提示词缓存的前缀）
+CODEGEN_SYSTEM_PROMPT = (
+    "你是一名熟悉 PostgreSQL 和 Java Spring Boot 的后端开发助手。"
+    "需要了解数据库时，请调用提供的数据库工具获取真实的表和字段信息，不要猜测。"
+)
+
+
 class CodeGenAgent(SimpleAgent):
     """
     代码生成 Agent
@@ -230,7 +543,7 @@ class CodeGenAgent(SimpleAgent):
 
     def __init__(self):
         # 初始化基类
-        super().__init__()
+        super().__init__(system_prompt=CODEGEN_SYSTEM_PROMPT)
 
         # 初始化数据库工具
         self.db = get_db_tool()
@@ -307,14 +620,18 @@ class CodeGenAgent(SimpleAgent):
         # 工具 5: 获取表详细信息
         self.register_tool(
             name="get_table_info",
-            func=lambda table_name: self.db.get_table_info(table_name),
-            description="获取表的详细信息，包括记录数、表大小、字段结构等。",
+            func=lambda table_name, exact=False: self.db.get_table_info(table_name, exact=exact),
+            description="获取表的详细信息，包括记录数、表大小、字段结构等。记录数默认为统计估算值。",
             parameters={
                 "type": "object",
                 "properties": {
                     "table_name": {
                         "type": "string",
                         "description": "表名"
+                    },
+                    "exact": {
+                        "type": "boolean",
+                        "description": "是否精确统计记录数（大表较慢），默认 false 返回估算值"
                     }
                 },
                 "required": ["table_name"]
@@ -0,0 +1,68 @@
+"""
+Agent 配置 - 启动时从 .env / 环境变量读取一次，之后只读
+"""
+import os
+from dataclasses import dataclass
+from typing import Dict, Any, Optional
+from dotenv import load_dotenv
+
+
+@dataclass(frozen=True)
+class Config:
+    """Agent 与数据库工具使用的配置（不可变）"""
+
+    # LLM 配置
+    api_key: Optional[str]
+    base_url: str
+    model: str
+
+    # 数据库配置
+    db_host: str
+    db_port: int
+    db_name: Optional[str]
+    db_user: Optional[str]
+    db_password: Optional[str]
+
+    @classmethod
+    def from_env(cls) -> "Config":
+        """从环境变量构建配置"""
+        return cls(
+            # 优先使用 DEEPSEEK_API_KEY，如果没有则使用 API_KEY
+            api_key=os.getenv("DEEPSEEK_API_KEY") or os.getenv("API_KEY"),
+            base_url=os.getenv("DEEPSEEK_API_URL", "https://api.deepseek.com/v1"),
+            model=os.getenv("LLM_MODEL", "deepseek-chat"),
+            db_host=os.getenv("DB_HOST", "localhost"),
+            db_port=int(os.getenv("DB_PORT", 5432)),
+            db_name=os.getenv("DB_NAME"),
+            db_user=os.getenv("DB_USER"),
+            db_password=os.getenv("DB_PASSWORD")
+        )
+
+    @property
+    def db_config(self) -> Dict[str, Any]:
+        """psycopg2 连接参数"""
+        return {
+            "host": self.db_host,
+            "port": self.db_port,
+            "database": self.db_name,
+            "user": self.db_user,
+            "password": self.db_password
+        }
+
+
+# 模块导入时加载一次 .env
+load_dotenv()
+CONFIG = Config.from_env()
+
+
+def get_config() -> Config:
+    """返回当前配置"""
+    return CONFIG
+
+
+def refresh() -> Config:
+    """重新读取 .env 与环境变量并替换当前配置（用于测试或修改 .env 后）"""
+    global CONFIG
+    load_dotenv(override=True)
+    CONFIG = Config.from_env()
+    return CONFIG
@@ -2,37 +2,222 @@
 数据库工具 - 为 Agent 提供数据库访问能力
 支持 PostgreSQL 数据库
 """
-import os
-from typing import List, Dict, Any, Optional
-from dotenv import load_dotenv
-import psycopg2
-from psycopg2.extras import RealDictCursor
+import inspect
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional
+import sqlparse
+from sqlparse import tokens as T
+from cachetools import TTLCache
+from psycopg2 import sql
+from db_pool import ConnectionPool
+from ..config import Config, get_config
+
+
+def _cached(method):
+    """
+    缓存只读元数据查询的结果（键为方法名 + 参数）
+
+    数据库结构在 Agent 会话期间基本不变，重复查询直接返回缓存；
+    只缓存成功的结果，失败时下次调用会重新查询。
+    显式要求精确结果（exact=True）的调用总是直接查询，既不读也不写缓存。
+    """
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        if bound.arguments.get("exact"):
+            return method(self, *args, **kwargs)
+
+        key = (method.__name__, *list(bound.arguments.values())[1:])
+
+        with self._cache_lock:
+            cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        result = method(self, *args, **kwargs)
+        if result.get("success"):
+            with self._cache_lock:
+                self._cache[key] = result
+        return result
+
+    return wrapper
+
+
+# 作用于事务之外、只读事务也无法阻止的函数（终止会话、重载配置、跨库执行等）
+_UNSAFE_FUNCTIONS = frozenset({
+    "pg_terminate_backend",
+    "pg_cancel_backend",
+    "pg_reload_conf",
+    "pg_rotate_logfile",
+    "dblink_exec",
+})
+
+
+def _statement_type(statement) -> str:
+    """
+    返回语句类型，兼容以括号开头的查询（如 (SELECT 1) UNION (SELECT 2)）
+    """
+    statement_type = statement.get_type()
+    if statement_type != "UNKNOWN":
+        return statement_type
+
+    for token in statement.flatten():
+        if token.is_whitespace or token.ttype in T.Comment or token.value == "(":
+            continue
+        if token.ttype is T.Keyword.DML:
+            return token.normalized
+        break
+    return statement_type
+
+
+def _check_read_only(query: str) -> Optional[str]:
+    """
+    检查 SQL 是否为单条只读 SELECT 查询
+
+    这只是发送到数据库之前的快速拒绝：SELECT 中调用的函数仍可能写入数据，
+    真正的只读保证由 execute_query 中的只读事务提供
+
+    Returns:
+        不满足条件时返回错误信息，否则返回 None
+    """
+    statements = [
+        statement for statement in sqlparse.parse(query)
+        if statement.token_first(skip_cm=True) is not None
+    ]
+    if len(statements) != 1:
+        return "只允许执行单条 SQL 语句"
+
+    statement = statements[0]
+    if _statement_type(statement) != "SELECT":
+        return "只允许执行 SELECT 查询"
+
+    for token in statement.flatten():
+        # 带引号的标识符（"pg_cancel_backend"）被解析为 Symbol
+        if token.ttype in T.Name or token.ttype in T.Literal.String.Symbol:
+            name = token.value.strip('"').lower()
+            if name in _UNSAFE_FUNCTIONS:
+                return f"查询中不允许调用 {name}"
+
+    keyword_tokens = [token for token in statement.flatten() if token.ttype in T.Keyword]
+    for token in keyword_tokens:
+        # 例如 WITH ... AS (DELETE ... RETURNING *) SELECT ...
+        if token.ttype in (T.Keyword.DML, T.Keyword.DDL) and token.normalized != "SELECT":
+            return f"查询中不允许包含 {token.normalized}"
+
+    keywords = [token.normalized for token in keyword_tokens]
+    if "INTO" in keywords:
+        return "不允许使用 SELECT INTO"
+    for current, following in zip(keywords, keywords[1:]):
+        if current == "FOR" and following in ("UPDATE", "SHARE", "NO", "KEY"):
+            return "不允许使用加锁查询（FOR UPDATE / FOR SHARE）"
+
+    return None
+
+
+# 高频元数据查询的服务端预编译语句（名称 -> PREPARE 语句）
+# 每个连接首次使用时 PREPARE 一次，之后 EXECUTE 时 PostgreSQL 跳过解析和规划
+_PREPARED_STATEMENTS = {
+    "lifehub_list_tables": """
+        PREPARE lifehub_list_tables (text, text) AS
+        SELECT table_name
+        FROM information_schema.tables
+        WHERE table_schema = $1
+        AND table_type = 'BASE TABLE'
+        AND table_name LIKE $2
+        ORDER BY table_name COLLATE "C"
+    """,
+    # 直接查询 pg_catalog（按 attrelid 走索引），避免 information_schema 视图的大量关联
+    "lifehub_table_schema": """
+        PREPARE lifehub_table_schema (text, text) AS
+        SELECT
+            a.attname AS column_name,
+            format_type(a.atttypid, NULL) AS data_type,
+            CASE
+                WHEN a.atttypid IN ('varchar'::regtype, 'bpchar'::regtype) AND a.atttypmod > 0
+                THEN a.atttypmod - 4
+            END AS character_maximum_length,
+            NOT a.attnotnull AS nullable,
+            pg_get_expr(d.adbin, d.adrelid) AS column_default,
+            a.attnum AS ordinal_position,
+            EXISTS (
+                SELECT 1 FROM pg_index i
+                WHERE i.indrelid = a.attrelid
+                AND i.indisprimary
+                AND a.attnum = ANY(i.indkey)
+            ) AS is_primary_key,
+            col_description(a.attrelid, a.attnum) AS comment
+        FROM pg_attribute a
+        LEFT JOIN pg_attrdef d
+            ON d.adrelid = a.attrelid
+            AND d.adnum = a.attnum
+        WHERE a.attrelid = to_regclass(quote_ident($1) || '.' || quote_ident($2))
+        AND a.attnum > 0
+        AND NOT a.attisdropped
+        ORDER BY a.attnum
+    """,
+}
 
 
 class DatabaseTool:
     """数据库操作工具类"""
 
-    def __init__(self, db_config: Optional[Dict[str, str]] = None):
+    # 连接池最大连接数（与 Agent 并发执行工具的线程数保持一致）
+    POOL_MAX_CONNECTIONS = 8
+
+    # execute_query 最多返回的行数
+    MAX_QUERY_ROWS = 1000
+
+    # 元数据缓存容量与过期时间（秒）
+    CACHE_MAX_SIZE = 512
+    CACHE_TTL = 300
+
+    def __init__(
+        self,
+        db_config: Optional[Dict[str, str]] = None,
+        config: Optional[Config] = None
+    ):
         """
         初始化数据库工具
 
         Args:
-            db_config: 数据库配置字典，如果不提供则从环境变量读取
+            db_config: 数据库配置字典，如果不提供则使用 config 中的数据库配置
+            config: Agent 配置，默认使用启动时加载的全局配置
         """
-        load_dotenv()
-
         if db_config:
             self.db_config = db_config
         else:
-            self.db_config = {
-                "host": os.getenv("DB_HOST", "localhost"),
-                "port": int(os.getenv("DB_PORT", 5432)),
-                "database": os.getenv("DB_NAME"),
-                "user": os.getenv("DB_USER"),
-                "password": os.getenv("DB_PASSWORD")
-            }
+            self.db_config = (config or get_config()).db_config
+
+        self._db = ConnectionPool(self.db_config, self.POOL_MAX_CONNECTIONS, _PREPARED_STATEMENTS)
+
+        # 表列表 / 表结构 / 表信息的查询缓存（TTL + LRU）
+        self._cache = TTLCache(maxsize=self.CACHE_MAX_SIZE, ttl=self.CACHE_TTL)
+        self._cache_lock = threading.Lock()
+
+    def invalidate_cache(self, table_name: Optional[str] = None):
+        """
+        清除元数据缓存
 
-        self._connection = None
+        Args:
+            table_name: 只清除与该表相关的缓存（同时清除表列表缓存），为空时清除全部
+        """
+        with self._cache_lock:
+            if table_name is None:
+                self._cache.clear()
+                return
+
+            for key in list(self._cache.keys()):
+                if key[0] == "list_tables" or table_name in key[1:]:
+                    self._cache.pop(key, None)
+
+    def close(self):
+        """关闭连接池中的所有连接"""
+        self._db.close()
 
     def test_connection(self) -> Dict[str, Any]:
         """
@@ -48,15 +233,10 @@ class DatabaseTool:
             }
         """
         try:
-            conn = psycopg2.connect(**self.db_config)
-            cursor = conn.cursor()
-
-            # 获取数据库版本
-            cursor.execute("SELECT version()")
-            version = cursor.fetchone()[0]
-
-            cursor.close()
-            conn.close()
+            with self._db.cursor() as cursor:
+                # 获取数据库版本
+                cursor.execute("SELECT version()")
+                version = cursor.fetchone()[0]
 
             return {
                 "success": True,
@@ -81,6 +261,7 @@ class DatabaseTool:
                 }
             }
 
+    @_cached
     def list_tables(
         self,
         schema: str = "public",
@@ -102,32 +283,15 @@ class DatabaseTool:
             }
         """
         try:
-            conn = psycopg2.connect(**self.db_config)
-            cursor = conn.cursor()
-
-            # 查询表列表
-            query = """
-                SELECT table_name, table_type
-                FROM information_schema.tables
-                WHERE table_schema = %s
-                AND table_type = 'BASE TABLE'
-            """
-
-            if prefix:
-                query += " AND table_name LIKE %s"
-                cursor.execute(query, (schema, f"{prefix}%"))
-            else:
-                cursor.execute(query, (schema,))
-
-            rows = cursor.fetchall()
-            tables = [row[0] for row in rows]
-
-            cursor.close()
-            conn.close()
+            # 查询表列表（无前缀时 LIKE '%' 匹配全部表；SQL 中已按字节序排序）
+            with self._db.cursor() as cursor:
+                self._db.execute_prepared(cursor, "lifehub_list_tables", (schema, f"{prefix}%"))
+                rows = cursor.fetchall()
+                tables = [row[0] for row in rows]
 
             return {
                 "success": True,
-                "tables": sorted(tables),
+                "tables": tables,
                 "count": len(tables),
                 "schema": schema,
                 "prefix": prefix
@@ -140,6 +304,7 @@ class DatabaseTool:
                 "message": f"获取表列表失败: {str(e)}"
             }
 
+    @_cached
     def get_table_schema(
         self,
         table_name: str,
@@ -175,83 +340,34 @@ class DatabaseTool:
             }
         """
         try:
-            conn = psycopg2.connect(**self.db_config)
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-
-            # 1. 获取字段信息
-            column_query = """
-                SELECT
-                    column_name,
-                    data_type,
-                    character_maximum_length,
-                    is_nullable,
-                    column_default,
-                    ordinal_position
-                FROM information_schema.columns
-                WHERE table_schema = %s
-                AND table_name = %s
-                ORDER BY ordinal_position
-            """
-            cursor.execute(column_query, (schema, table_name))
-            columns_info = cursor.fetchall()
+            # 一次查询同时获取字段信息、主键标记和字段注释
+            with self._db.cursor(dict_cursor=True) as cursor:
+                self._db.execute_prepared(cursor, "lifehub_table_schema", (schema, table_name))
+                columns_info = cursor.fetchall()
 
             if not columns_info:
-                cursor.close()
-                conn.close()
                 return {
                     "success": False,
                     "error": f"表 {table_name} 不存在"
                 }
 
-            # 2. 获取主键信息
-            pk_query = """
-                SELECT a.column_name
-                FROM information_schema.table_constraints t
-                JOIN information_schema.key_column_usage a
-                    ON t.constraint_name = a.constraint_name
-                WHERE t.table_schema = %s
-                AND t.table_name = %s
-                AND t.constraint_type = 'PRIMARY KEY'
-            """
-            cursor.execute(pk_query, (schema, table_name))
-            primary_keys = [row["column_name"] for row in cursor.fetchall()]
-
-            # 3. 获取字段注释（PostgreSQL 使用 pg_description）
-            comment_query = """
-                SELECT
-                    a.column_name,
-                    pgd.description as comment
-                FROM information_schema.columns a
-                LEFT JOIN pg_catalog.pg_description pgd
-                    ON pgd.objoid = (
-                        SELECT oid FROM pg_class
-                        WHERE relname = a.table_name
-                    )
-                    AND pgd.objsubid = a.ordinal_position
-                WHERE a.table_schema = %s
-                AND a.table_name = %s
-            """
-            cursor.execute(comment_query, (schema, table_name))
-            comments = {row["column_name"]: row["comment"]
-                       for row in cursor.fetchall() if row["comment"]}
-
-            # 4. 组装字段信息
+            # 组装字段信息
             columns = []
+            primary_keys = []
             for col in columns_info:
                 col_name = col["column_name"]
+                if col["is_primary_key"]:
+                    primary_keys.append(col_name)
                 columns.append({
                     "name": col_name,
                     "type": col["data_type"],
                     "max_length": col["character_maximum_length"],
-                    "nullable": col["is_nullable"] == "YES",
+                    "nullable": col["nullable"],
                     "default": col["column_default"],
-                    "is_primary_key": col_name in primary_keys,
-                    "comment": comments.get(col_name, "")
+                    "is_primary_key": col["is_primary_key"],
+                    "comment": col["comment"] or ""
                 })
 
-            cursor.close()
-            conn.close()
-
             return {
                 "success": True,
                 "table_name": table_name,
@@ -272,7 +388,8 @@ class DatabaseTool:
         self,
         query: str,
         params: Optional[tuple] = None,
-        fetch: str = "all"
+        fetch: str = "all",
+        read_only: bool = True
     ) -> Dict[str, Any]:
         """
         执行 SQL 查询
@@ -281,28 +398,44 @@ class DatabaseTool:
             query: SQL 查询语句
             params: 查询参数（用于参数化查询，防止 SQL 注入）
             fetch: 返回模式，'all', 'one', 'none'
+            read_only: 是否只允许只读查询（先检查是否为单条 SELECT，再在只读事务中执行）
 
         Returns:
             {
                 "success": True/False,
                 "rows": [...],
                 "row_count": 行数,
-                "columns": ["列名", ...]
+                "columns": ["列名", ...],
+                "truncated": 结果是否超过 MAX_QUERY_ROWS 行而被截断
             }
         """
-        try:
-            conn = psycopg2.connect(**self.db_config)
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-
-            cursor.execute(query, params or ())
+        if read_only:
+            error = _check_read_only(query)
+            if error:
+                return {
+                    "success": False,
+                    "error": error,
+                    "message": f"查询被拒绝: {error}"
+                }
 
-            if fetch == "all":
-                rows = cursor.fetchall()
-            elif fetch == "one":
-                rows = [cursor.fetchone()] if cursor.rowcount > 0 else []
-            else:
+        truncated = False
+        try:
+            if fetch == "none":
+                with self._db.cursor(dict_cursor=True, read_only=read_only) as cursor:
+                    cursor.execute(query, params or ())
                 rows = []
-                conn.commit()
+            else:
+                # 使用服务端游标，只拉取需要的行，避免大结果集一次性载入内存
+                with self._db.cursor(dict_cursor=True, name="agent_query", read_only=read_only) as cursor:
+                    cursor.execute(query, params or ())
+
+                    if fetch == "all":
+                        rows = cursor.fetchmany(self.MAX_QUERY_ROWS + 1)
+                        truncated = len(rows) > self.MAX_QUERY_ROWS
+                        rows = rows[:self.MAX_QUERY_ROWS]
+                    else:
+                        row = cursor.fetchone()
+                        rows = [row] if row is not None else []
 
             # 获取列名
             if rows:
@@ -313,14 +446,12 @@ class DatabaseTool:
                 columns = []
                 rows = []
 
-            cursor.close()
-            conn.close()
-
             return {
                 "success": True,
                 "rows": rows,
                 "row_count": len(rows),
-                "columns": columns
+                "columns": columns,
+                "truncated": truncated
             }
 
         except Exception as e:
@@ -330,10 +461,32 @@ class DatabaseTool:
                 "message": f"查询执行失败: {str(e)}"
             }
 
+    def _get_table_stats(self, table_name: str, schema: str) -> tuple:
+        """获取表的估算行数和总大小（标识符在服务端用 quote_ident 转义）"""
+        stats_query = """
+            SELECT c.reltuples::bigint, pg_size_pretty(pg_total_relation_size(c.oid))
+            FROM pg_class c
+            WHERE c.oid = (quote_ident(%s) || '.' || quote_ident(%s))::regclass
+        """
+        with self._db.cursor() as cursor:
+            cursor.execute(stats_query, (schema, table_name))
+            return cursor.fetchone()
+
+    def _count_rows(self, table_name: str, schema: str) -> int:
+        """使用 COUNT(*) 精确统计表行数"""
+        count_query = sql.SQL("SELECT COUNT(*) FROM {}").format(
+            sql.Identifier(schema, table_name)
+        )
+        with self._db.cursor() as cursor:
+            cursor.execute(count_query)
+            return cursor.fetchone()[0]
+
+    @_cached
     def get_table_info(
         self,
         table_name: str,
-        schema: str = "public"
+        schema: str = "public",
+        exact: bool = False
     ) -> Dict[str, Any]:
         """
         获取表的详细信息（包括记录数、创建时间等）
@@ -341,44 +494,46 @@ class DatabaseTool:
         Args:
             table_name: 表名
             schema: 数据库 schema
+            exact: 是否使用 COUNT(*) 精确统计行数（大表会全表扫描），
+                   默认使用 pg_class.reltuples 统计估算值
 
         Returns:
             {
                 "success": True/False,
                 "table_name": "表名",
                 "row_count": 行数,
+                "row_count_exact": 行数是否为精确值,
                 "size": "表大小",
                 "columns": [...],
                 ...
             }
         """
         try:
-            conn = psycopg2.connect(**self.db_config)
-            cursor = conn.cursor()
-
-            # 获取表行数
-            count_query = f"SELECT COUNT(*) FROM {schema}.{table_name}"
-            cursor.execute(count_query)
-            row_count = cursor.fetchone()[0]
+            # 统计信息、表结构（以及精确行数）互相独立，各自借用连接并发查询
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                stats_future = executor.submit(self._get_table_stats, table_name, schema)
+                schema_future = executor.submit(self.get_table_schema, table_name, schema)
+                count_future = (
+                    executor.submit(self._count_rows, table_name, schema) if exact else None
+                )
 
-            # 获取表大小
-            size_query = """
-                SELECT pg_size_pretty(pg_total_relation_size(%s))
-            """
-            cursor.execute(size_query, (f"{schema}.{table_name}",))
-            table_size = cursor.fetchone()[0]
+                row_count, table_size = stats_future.result()
 
-            cursor.close()
-            conn.close()
+                # 需要精确值，或表从未 ANALYZE 过（reltuples 为 -1）时使用 COUNT(*)
+                row_count_exact = exact or row_count < 0
+                if count_future is not None:
+                    row_count = count_future.result()
+                elif row_count_exact:
+                    row_count = self._count_rows(table_name, schema)
 
-            # 获取表结构
-            schema_result = self.get_table_schema(table_name, schema)
+                schema_result = schema_future.result()
 
             return {
                 "success": True,
                 "table_name": table_name,
                 "schema": schema,
                 "row_count": row_count,
+                "row_count_exact": row_count_exact,
                 "size": table_size,
                 "columns": schema_result.get("columns", []),
                 "primary_keys": schema_result.get("primary_keys", [])
@@ -398,7 +553,7 @@ def get_db_tool() -> DatabaseTool:
     return DatabaseTool()
 
 
-# 测试代码
+# 测试代码（模块使用了包内相对导入，需在项目根目录以模块方式运行：python -m Agent.tools.database_tool）
 if __name__ == "__main__":
     db = get_db_tool()
 
@@ -2,77 +2,95 @@
 检查 .env 配置是否正确
 """
 import os
+from functools import lru_cache
 from dotenv import load_dotenv
 
-def check_config():
-    """检查环境变量配置"""
-    print("="*60)
-    print("检查 .env 配置")
-    print("="*60)
+# 需要检查的数据库配置项: (环境变量名, 是否隐藏值)
+DB_KEYS = (
+    ("DB_HOST", False),
+    ("DB_PORT", False),
+    ("DB_NAME", False),
+    ("DB_USER", False),
+    ("DB_PASSWORD", True),
+)
 
-    # 加载环境变量
-    load_dotenv(override=True)
+SEPARATOR = "=" * 60
+
+
+@lru_cache(maxsize=1)
+def _load_env() -> bool:
+    """加载 .env（只读一次磁盘，refresh 时清除缓存重新读取）"""
+    return load_dotenv(override=True)
+
+
+def _db_line(key: str, is_secret: bool) -> str:
+    """格式化单个数据库配置项"""
+    value = os.getenv(key)
+    if not value:
+        return f"  ✗ {key}: 未设置"
+    return f"  ✓ {key}: {'****' if is_secret else value}"
+
+
+def check_config(refresh: bool = False):
+    """
+    检查环境变量配置
+
+    Args:
+        refresh: 是否重新读取 .env 文件
+    """
+    if refresh:
+        _load_env.cache_clear()
+    _load_env()
+
+    lines = [SEPARATOR, "检查 .env 配置", SEPARATOR]
 
     # 检查数据库配置
-    print("\n【数据库配置】")
-    db_configs = {
-        "DB_HOST": os.getenv("DB_HOST"),
-        "DB_PORT": os.getenv("DB_PORT"),
-        "DB_NAME": os.getenv("DB_NAME"),
-        "DB_USER": os.getenv("DB_USER"),
-        "DB_PASSWORD": os.getenv("DB_PASSWORD")
-    }
-
-    db_ok = True
-    for key, value in db_configs.items():
-        if value:
-            # 隐藏密码
-            display_value = "****" if "PASSWORD" in key else value
-            print(f"  ✓ {key}: {display_value}")
-        else:
-            print(f"  ✗ {key}: 未设置")
-            db_ok = False
+    db_ok = all(os.getenv(key) for key, _ in DB_KEYS)
+    lines.append("\n【数据库配置】")
+    lines.extend(_db_line(key, is_secret) for key, is_secret in DB_KEYS)
 
     if not db_ok:
-        print("\n⚠️  数据库配置不完整，请在 .env 文件中设置")
+        lines.append("\n⚠️  数据库配置不完整，请在 .env 文件中设置")
 
     # 检查 API 配置
-    print("\n【API 配置】")
+    lines.append("\n【API 配置】")
 
     # 优先使用 DEEPSEEK_API_KEY
     api_key = os.getenv("DEEPSEEK_API_KEY") or os.getenv("API_KEY")
     base_url = os.getenv("AI_BASE_URL", "https://api.deepseek.com/v1")
     model = os.getenv("LLM_MODEL", "deepseek-chat")
 
-    if api_key:
-        print(f"  ✓ API Key: {api_key[:10]}...{api_key[-4:]}")
-        print(f"  ✓ Base URL: {base_url}")
-        print(f"  ✓ Model: {model}")
-        api_ok = True
+    api_ok = bool(api_key)
+    if api_ok:
+        lines.append(f"  ✓ API Key: {api_key[:10]}...{api_key[-4:]}")
+        lines.append(f"  ✓ Base URL: {base_url}")
+        lines.append(f"  ✓ Model: {model}")
     else:
-        print(f"  ✗ API Key: 未设置")
-        print(f"    提示: 请在 .env 中设置 DEEPSEEK_API_KEY=sk-xxxxx")
-        api_ok = False
+        lines.append("  ✗ API Key: 未设置")
+        lines.append("    提示: 请在 .env 中设置 DEEPSEEK_API_KEY=sk-xxxxx")
 
     # 总结
-    print("\n" + "="*60)
+    lines.append("\n" + SEPARATOR)
     if db_ok and api_ok:
-        print("✅ 配置检查通过！可以运行 Agent 了")
-        print("\n运行命令:")
-        print("  python test_agent.py")
+        lines.append("✅ 配置检查通过！可以运行 Agent 了")
+        lines.append("\n运行命令:")
+        lines.append("  python test_agent.py")
     else:
-        print("⚠️  配置不完整，请检查 .env 文件")
+        lines.append("⚠️  配置不完整，请检查 .env 文件")
         if not db_ok:
-            print("\n缺失数据库配置，请在 .env 中添加:")
-            print("  DB_HOST=localhost")
-            print("  DB_PORT=5432")
-            print("  DB_NAME=your_database")
-            print("  DB_USER=your_username")
-            print("  DB_PASSWORD=your_password")
+            lines.append("\n缺失数据库配置，请在 .env 中添加:")
+            lines.append("  DB_HOST=localhost")
+            lines.append("  DB_PORT=5432")
+            lines.append("  DB_NAME=your_database")
+            lines.append("  DB_USER=your_username")
+            lines.append("  DB_PASSWORD=your_password")
         if not api_ok:
-            print("\n缺失 API 配置，请在 .env 中添加:")
-            print("  DEEPSEEK_API_KEY=sk-your-api-key-here")
-    print("="*60)
+            lines.append("\n缺失 API 配置，请在 .env 中添加:")
+            lines.append("  DEEPSEEK_API_KEY=sk-your-api-key-here")
+    lines.append(SEPARATOR)
+
+    # 一次性输出
+    print("\n".join(lines))
 
     return db_ok and api_ok
 
@@ -0,0 +1,124 @@
+"""
+PostgreSQL 连接池 - CodegenService 与 Agent 的 DatabaseTool 共用
+"""
+import threading
+import weakref
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool
+
+
+class ConnectionPool:
+    """
+    按需创建的线程安全连接池
+
+    - 首次借出连接时才建立连接，导入和初始化时不访问数据库
+    - 连接耗尽时排队等待，而不是像 ThreadedConnectionPool 那样直接抛异常
+    - 支持服务端预编译语句，每个连接首次使用时 PREPARE 一次
+    """
+
+    def __init__(
+        self,
+        db_config: Dict[str, Any],
+        max_connections: int,
+        prepared_statements: Optional[Dict[str, str]] = None
+    ):
+        """
+        初始化连接池
+
+        Args:
+            db_config: psycopg2 连接参数
+            max_connections: 最大连接数
+            prepared_statements: 预编译语句（名称 -> PREPARE 语句）
+        """
+        self.db_config = db_config
+        self.max_connections = max_connections
+        self.prepared_statements = prepared_statements or {}
+
+        self._pool: Optional[ThreadedConnectionPool] = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_connections)
+
+        # 每个连接上已 PREPARE 的语句名称（连接被丢弃后自动清理）
+        self._prepared = weakref.WeakKeyDictionary()
+
+    def _get_pool(self) -> ThreadedConnectionPool:
+        """获取底层连接池（首次使用时创建）"""
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadedConnectionPool(
+                        minconn=1,
+                        maxconn=self.max_connections,
+                        **self.db_config
+                    )
+        return self._pool
+
+    @contextmanager
+    def cursor(
+        self,
+        dict_cursor: bool = False,
+        name: Optional[str] = None,
+        read_only: bool = False
+    ):
+        """
+        借出一个连接并返回游标，使用完毕后提交并归还连接
+
+        Args:
+            dict_cursor: 是否使用 RealDictCursor（按列名返回字典）
+            name: 游标名称，指定时创建服务端游标（结果按需分批拉取）
+            read_only: 在只读事务中执行，由数据库拒绝任何写入；结束时回滚，
+                同时撤销 set_config 等会话级修改，避免带入其他请求
+        """
+        pool = self._get_pool()
+        with self._slots:
+            conn = pool.getconn()
+            try:
+                if read_only:
+                    # 必须是事务中的第一条语句（服务端游标无法执行，先用普通游标）
+                    with conn.cursor() as setup_cursor:
+                        setup_cursor.execute("SET TRANSACTION READ ONLY")
+
+                cursor_factory = RealDictCursor if dict_cursor else None
+                with conn.cursor(name=name, cursor_factory=cursor_factory) as cursor:
+                    yield cursor
+
+                if read_only:
+                    conn.rollback()
+                else:
+                    conn.commit()
+            except Exception:
+                if not conn.closed:
+                    conn.rollback()
+                raise
+            finally:
+                # 已断开的连接直接丢弃
+                pool.putconn(conn, close=bool(conn.closed))
+
+    def execute_prepared(self, cursor, name: str, params: tuple):
+        """
+        通过服务端预编译语句执行查询
+
+        Args:
+            cursor: 由 cursor() 借出的游标
+            name: prepared_statements 中的语句名称
+            params: 查询参数
+        """
+        conn = cursor.connection
+        with self._lock:
+            prepared = self._prepared.setdefault(conn, set())
+
+        if name not in prepared:
+            cursor.execute(self.prepared_statements[name])
+            prepared.add(name)
+
+        placeholders = ", ".join(["%s"] * len(params))
+        cursor.execute(f"EXECUTE {name} ({placeholders})", params)
+
+    def close(self):
+        """关闭所有连接（之后再次使用时会重新创建）"""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.closeall()
+                self._pool = None
@@ -4,16 +4,12 @@ import os
 import sys
 import signal
 import logging
+import threading
 from concurrent import futures
-from pathlib import Path
 from typing import Optional
 
 import grpc
 
-# Add project root to path
-project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
-
 # Import generated protobuf classes
 from generated import health_pb2_grpc
 from grpc.services.health_service import HealthService
@@ -21,6 +17,13 @@ from grpc.services.health_service import HealthService
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# gRPC server channel options
+SERVER_OPTIONS = [
+    # Ping idle clients so dead connections are detected and live ones stay open
+    ("grpc.keepalive_time_ms", 30000),
+    ("grpc.keepalive_timeout_ms", 10000),
+]
+
 
 class GRPCServer:
     """gRPC server for LifeHubAI."""
@@ -30,6 +33,9 @@ class GRPCServer:
         host: Optional[str] = None,
         port: Optional[int] = None,
         max_workers: Optional[int] = None,
+        max_concurrent_rpcs: Optional[int] = None,
+        max_concurrent_per_conn: Optional[int] = None,
+        ready_event: Optional[threading.Event] = None,
     ):
         """
         Initialize gRPC server.
@@ -38,10 +44,23 @@ class GRPCServer:
             host: Server host address (default from env or 0.0.0.0)
             port: Server port (default from env or 50051)
             max_workers: Maximum number of worker threads (default from env or 10)
+            max_concurrent_rpcs: Maximum in-flight RPCs across the server; further
+                RPCs fail with RESOURCE_EXHAUSTED (default from env or 100)
+            max_concurrent_per_conn: Maximum concurrent streams (RPCs) on one
+                HTTP/2 connection (default from env or 1000)
+            ready_event: Event set once the server is bound and started
         """
         self.host = host or os.getenv("GRPC_SERVER_HOST", "0.0.0.0")
         self.port = port or int(os.getenv("GRPC_SERVER_PORT", "50051"))
         self.max_workers = max_workers or int(os.getenv("GRPC_MAX_WORKERS", "10"))
+        self.max_concurrent_rpcs = max_concurrent_rpcs or int(
+            os.getenv("GRPC_MAX_CONCURRENT_RPCS", "100")
+        )
+        self.max_concurrent_per_conn = max_concurrent_per_conn or int(
+            os.getenv("GRPC_MAX_CONCURRENT_PER_CONN", "1000")
+        )
+
+        self.ready_event = ready_event
 
         self.server: Optional[grpc.Server] = None
 
@@ -53,18 +72,29 @@ class GRPCServer:
             Configured grpc.Server instance
         """
         # Create thread pool executor
-        thread_pool = futures.ThreadPoolExecutor(max_workers=self.max_workers)
-
-        # Create gRPC server
-        server = grpc.server(thread_pool)
+        thread_pool = futures.ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="grpc",
+        )
+
+        # Create gRPC server; RPCs beyond max_concurrent_rpcs are rejected
+        # instead of queueing without bound behind the worker threads
+        server = grpc.server(
+            thread_pool,
+            options=SERVER_OPTIONS + [
+                ("grpc.max_concurrent_streams", self.max_concurrent_per_conn),
+            ],
+            maximum_concurrent_rpcs=self.max_concurrent_rpcs,
+        )
 
         # Register health service
         health_service = HealthService()
         health_pb2_grpc.add_HealthServicer_to_server(health_service, server)
 
-        # Configure server port
+        # Configure server port (older grpcio returns 0 instead of raising on bind failure)
         server_address = f"{self.host}:{self.port}"
-        server.add_insecure_port(server_address)
+        if server.add_insecure_port(server_address) == 0:
+            raise RuntimeError(f"Failed to bind gRPC server to {server_address}")
 
         logger.info(f"gRPC server configured on {server_address}")
 
@@ -83,14 +113,18 @@ class GRPCServer:
         self.server.start()
 
         logger.info(f"gRPC server started on {self.host}:{self.port}")
+        if self.ready_event is not None:
+            self.ready_event.set()
 
-        # Setup signal handlers for graceful shutdown
+        # Setup signal handlers for graceful shutdown (only possible from the main thread;
+        # in dual server mode the launcher owns signal handling)
         def handle_shutdown(signum, frame):
             logger.info(f"Received signal {signum}, shutting down...")
             self.stop()
 
-        signal.signal(signal.SIGINT, handle_shutdown)
-        signal.signal(signal.SIGTERM, handle_shutdown)
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGINT, handle_shutdown)
+            signal.signal(signal.SIGTERM, handle_shutdown)
 
         # Wait for termination
         try:
@@ -112,6 +146,8 @@ class GRPCServer:
         self.server.start()
 
         logger.info(f"gRPC server started on {self.host}:{self.port}")
+        if self.ready_event is not None:
+            self.ready_event.set()
 
     def stop(self, grace_period: int = 5):
         """
@@ -1,25 +1,28 @@
 """Health check gRPC service implementation."""
 
 import time
-from typing import Optional
 
 import grpc
-from google.protobuf.timestamp_pb2 import Timestamp
 
 # Import generated protobuf classes
-import sys
-from pathlib import Path
-
-# Add project root to path
-project_root = Path(__file__).parent.parent.parent
-sys.path.insert(0, str(project_root))
-
 from generated import health_pb2
 from generated.health_pb2_grpc import HealthServicer
 
 # Import existing services
 from services.codegen_service import CodegenService
-from services.tts_service import TtsService
+from services.tts_service import TTSService
+
+# Service name (lowercase) -> HealthService method performing the check
+SERVICE_CHECKS = {
+    "code_generation": "_check_codegen_service",
+    "codegen": "_check_codegen_service",
+    "code_generation_service": "_check_codegen_service",
+    "text_to_speech": "_check_tts_service",
+    "tts": "_check_tts_service",
+    "tts_service": "_check_tts_service",
+    "database": "_check_database_service",
+    "db": "_check_database_service",
+}
 
 
 class HealthService(HealthServicer):
@@ -28,7 +31,13 @@ class HealthService(HealthServicer):
     def __init__(self):
         """Initialize health service with existing service instances."""
         self.codegen_service = CodegenService()
-        self.tts_service = TtsService()
+        self.tts_service = TTSService()
+
+        # Static part of the overall health response, copied per Check RPC
+        self._healthy_template = health_pb2.HealthResponse(
+            status="healthy",
+            version="1.0.0",
+        )
 
     def Check(self, request, context) -> health_pb2.HealthResponse:
         """
@@ -42,15 +51,10 @@ class HealthService(HealthServicer):
             HealthResponse with status, version, and timestamp
         """
         try:
-            # Get current timestamp
-            timestamp = int(time.time())
-
-            # Build response
-            response = health_pb2.HealthResponse(
-                status="healthy",
-                version="1.0.0",
-                timestamp=timestamp,
-            )
+            # Copy the prebuilt response and only set the timestamp
+            response = health_pb2.HealthResponse()
+            response.CopyFrom(self._healthy_template)
+            response.timestamp = int(time.time())
 
             return response
 
@@ -78,20 +82,17 @@ class HealthService(HealthServicer):
         service_name = request.service_name.lower()
 
         try:
-            if service_name in ["code_generation", "codegen", "code_generation_service"]:
-                return self._check_codegen_service()
-            elif service_name in ["text_to_speech", "tts", "tts_service"]:
-                return self._check_tts_service()
-            elif service_name in ["database", "db"]:
-                return self._check_database_service()
-            else:
-                context.set_code(grpc.StatusCode.NOT_FOUND)
-                context.set_details(f"Unknown service: {service_name}")
-                return health_pb2.ServiceHealthResponse(
-                    status="unknown",
-                    database_connected=False,
-                    message=f"Service '{service_name}' not found",
-                )
+            check = SERVICE_CHECKS.get(service_name)
+            if check is not None:
+                return getattr(self, check)()
+
+            context.set_code(grpc.StatusCode.NOT_FOUND)
+            context.set_details(f"Unknown service: {service_name}")
+            return health_pb2.ServiceHealthResponse(
+                status="unknown",
+                database_connected=False,
+                message=f"Service '{service_name}' not found",
+            )
 
         except Exception as e:
             context.set_code(grpc.StatusCode.INTERNAL)
@@ -105,12 +106,12 @@ class HealthService(HealthServicer):
     def _check_codegen_service(self) -> health_pb2.ServiceHealthResponse:
         """Check code generation service health."""
         try:
-            # Use existing service health check
-            health_info = self.codegen_service.get_health_info()
+            # CodegenService caches the result for HEALTH_CACHE_TTL seconds
+            database_connected = self.codegen_service.check_database_connection()
 
             return health_pb2.ServiceHealthResponse(
-                status="healthy" if health_info["database_connected"] else "unhealthy",
-                database_connected=health_info["database_connected"],
+                status="healthy" if database_connected else "unhealthy",
+                database_connected=database_connected,
                 message="Code generation service is operational",
             )
         except Exception as e:
@@ -123,13 +124,16 @@ class HealthService(HealthServicer):
     def _check_tts_service(self) -> health_pb2.ServiceHealthResponse:
         """Check TTS service health."""
         try:
-            # Use existing service health check
-            health_info = self.tts_service.get_health_info()
+            api_configured = self.tts_service.check_api_key()
 
             return health_pb2.ServiceHealthResponse(
-                status="healthy",
+                status="healthy" if api_configured else "unhealthy",
                 database_connected=False,  # TTS doesn't use database
-                message="Text-to-speech service is operational",
+                message=(
+                    "Text-to-speech service is operational"
+                    if api_configured
+                    else "Text-to-speech API key is not configured"
+                ),
             )
         except Exception as e:
             return health_pb2.ServiceHealthResponse(
@@ -141,13 +145,12 @@ class HealthService(HealthServicer):
     def _check_database_service(self) -> health_pb2.ServiceHealthResponse:
         """Check database service health."""
         try:
-            # Use codegen service to check database
-            health_info = self.codegen_service.get_health_info()
+            database_connected = self.codegen_service.check_database_connection()
 
             return health_pb2.ServiceHealthResponse(
-                status="healthy" if health_info["database_connected"] else "unhealthy",
-                database_connected=health_info["database_connected"],
-                message="Database connection is operational" if health_info["database_connected"] else "Database connection failed",
+                status="healthy" if database_connected else "unhealthy",
+                database_connected=database_connected,
+                message="Database connection is operational" if database_connected else "Database connection failed",
             )
         except Exception as e:
             return health_pb2.ServiceHealthResponse(
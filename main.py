@@ -1,55 +1,80 @@
 """
 LifeHubAI FastAPI 主应用
 """
+import os
+import sys
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+import orjson
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, Response
 
 from routers import codegen_router, tts_router
+from services.codegen_service import CodegenService
+from services.tts_service import TTSService
+
+
+# 路由中 asyncio.to_thread 使用的线程池大小（阻塞的数据库 / TTS 调用在此执行）
+API_THREADPOOL_SIZE = int(os.getenv("API_THREADPOOL_SIZE", "40"))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期：启动时创建服务实例，关闭时释放数据库连接池"""
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=API_THREADPOOL_SIZE, thread_name_prefix="api")
+    )
+    app.state.codegen_service = CodegenService()
+    app.state.tts_service = TTSService()
+    try:
+        yield
+    finally:
+        app.state.codegen_service.close()
 
 # 创建 FastAPI 应用
+# 不设置 default_response_class：路由均声明了 response_model，FastAPI 会直接用 Pydantic
+# 序列化为 JSON 字节；指定 ORJSONResponse 等自定义响应类反而会退回 dict + 二次序列化
 app = FastAPI(
     title="LifeHubAI API",
     description="AI 驱动的代码生成和文本转语音服务",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
-# 配置 CORS
+# 配置 CORS（允许的域名通过 CORS_ALLOW_ORIGINS 配置，逗号分隔）
+cors_allow_origins = [
+    origin.strip()
+    for origin in os.getenv(
+        "CORS_ALLOW_ORIGINS", "http://localhost:3000,http://localhost:5173"
+    ).split(",")
+    if origin.strip()
+]
+
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # 生产环境中应该指定具体的域名
+    allow_origins=cors_allow_origins,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST"],
+    allow_headers=["Content-Type", "Authorization"],
+    max_age=86400,  # 浏览器缓存预检结果一天
 )
 
+# 压缩较大的 JSON 响应（如表列表）；小于 500 字节的响应压缩收益不大，直接返回
+app.add_middleware(GZipMiddleware, minimum_size=500)
+
 # 注册路由
 app.include_router(codegen_router)
 app.include_router(tts_router)
 
 
-@app.get("/", summary="根路径")
-async def root():
-    """API 根路径"""
-    return {
-        "name": "LifeHubAI API",
-        "version": "1.0.0",
-        "description": "AI 驱动的代码生成和文本转语音服务",
-        "endpoints": {
-            "docs": "/docs",
-            "codegen": "/api/codegen",
-            "tts": "/api/tts"
-        }
-    }
-
-
-@app.get("/health", summary="健康检查")
-async def health_check():
-    """整体健康检查"""
-    import os
-
+def _build_health_payload() -> dict:
+    """构建整体健康检查响应（仅依赖启动时的环境变量）"""
     grpc_enabled = os.getenv("GRPC_ENABLED", "true").lower() in ("true", "1", "yes", "on")
 
     response = {
@@ -71,6 +96,32 @@ async def health_check():
     return response
 
 
+# 根路径和健康检查的响应内容固定，启动时序列化一次
+ROOT_RESPONSE_BODY = orjson.dumps({
+    "name": "LifeHubAI API",
+    "version": "1.0.0",
+    "description": "AI 驱动的代码生成和文本转语音服务",
+    "endpoints": {
+        "docs": "/docs",
+        "codegen": "/api/codegen",
+        "tts": "/api/tts"
+    }
+})
+HEALTH_RESPONSE_BODY = orjson.dumps(_build_health_payload())
+
+
+@app.get("/", summary="根路径")
+async def root():
+    """API 根路径"""
+    return Response(content=ROOT_RESPONSE_BODY, media_type="application/json")
+
+
+@app.get("/health", summary="健康检查")
+async def health_check():
+    """整体健康检查"""
+    return Response(content=HEALTH_RESPONSE_BODY, media_type="application/json")
+
+
 # 全局异常处理
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
@@ -88,11 +139,27 @@ async def global_exception_handler(request, exc):
 if __name__ == "__main__":
     import uvicorn
 
-    # 开发环境运行
-    uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
-        log_level="info"
-    )
+    host = os.getenv("FASTAPI_HOST", "0.0.0.0")
+    port = int(os.getenv("FASTAPI_PORT", "8000"))
+
+    if os.getenv("ENV", "dev") == "dev":
+        # 开发环境运行
+        uvicorn.run(
+            "main:app",
+            host=host,
+            port=port,
+            reload=True,
+            log_level="info"
+        )
+    else:
+        # 生产环境：多进程 + uvloop/httptools，关闭自动重载和访问日志（uvloop 不支持 Windows，改用 asyncio）
+        uvicorn.run(
+            "main:app",
+            host=host,
+            port=port,
+            workers=os.cpu_count() or 1,
+            loop="asyncio" if sys.platform == "win32" else "uvloop",
+            http="httptools",
+            log_level="info",
+            access_log=False
+        )
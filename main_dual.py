@@ -1,15 +1,16 @@
-"""Dual server launcher for FastAPI and gRPC."""
+"""Dual server launcher for FastAPI and gRPC.
+
+FastAPI is served by uvicorn with the uvloop event loop and the httptools
+HTTP parser (both installed by ``uvicorn[standard]``). They are requested
+explicitly so that a missing dependency fails at startup instead of
+silently falling back to asyncio + h11. uvloop does not support Windows,
+where the asyncio loop is used instead.
+"""
 
 import os
 import sys
 import threading
-import time
 import logging
-from pathlib import Path
-
-# Add project root to path
-project_root = Path(__file__).parent
-sys.path.insert(0, str(project_root))
 
 import uvicorn
 from grpc.server import GRPCServer, is_grpc_enabled
@@ -22,17 +23,32 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def run_grpc_server():
-    """Run gRPC server in a background thread."""
+# Seconds to wait for the gRPC server to bind before continuing startup
+GRPC_READY_TIMEOUT = 5
+
+
+def run_grpc_server(ready_event: threading.Event, startup_errors: list):
+    """
+    Run gRPC server in a background thread.
+
+    ready_event is set once the server is bound (by GRPCServer) or as soon as
+    startup fails; in the latter case the exception is appended to startup_errors.
+    """
     try:
         logger.info("Starting gRPC server thread...")
 
-        grpc_server = GRPCServer()
+        grpc_server = GRPCServer(ready_event=ready_event)
         grpc_server.start()  # This blocks
 
     except Exception as e:
+        if not ready_event.is_set():
+            startup_errors.append(e)
         logger.error(f"gRPC server error: {e}", exc_info=True)
 
+    finally:
+        # Never leave the launcher waiting on a server that is not coming up
+        ready_event.set()
+
 
 def run_fastapi_server():
     """Run FastAPI server."""
@@ -47,6 +63,8 @@ def run_fastapi_server():
             host=host,
             port=port,
             reload=False,  # No reload in production dual-server mode
+            loop="asyncio" if sys.platform == "win32" else "uvloop",
+            http="httptools",
             log_level="info",
         )
 
@@ -64,20 +82,23 @@ def run_dual_servers():
     grpc_thread = None
     if is_grpc_enabled():
         logger.info("gRPC server is enabled, starting in background thread...")
+        grpc_ready = threading.Event()
+        grpc_startup_errors = []
         grpc_thread = threading.Thread(
             target=run_grpc_server,
+            args=(grpc_ready, grpc_startup_errors),
             name="GRPCServer",
             daemon=True,  # Daemon thread will exit when main thread exits
         )
         grpc_thread.start()
 
-        # Wait a moment for gRPC to start
-        time.sleep(1)
-
-        if grpc_thread.is_alive():
-            logger.info("✓ gRPC server thread started successfully")
+        # Wait until the gRPC server is bound or has failed to start
+        if not grpc_ready.wait(timeout=GRPC_READY_TIMEOUT):
+            logger.warning(f"gRPC server not ready after {GRPC_READY_TIMEOUT}s, continuing startup")
+        elif grpc_startup_errors:
+            logger.error(f"gRPC server failed to start: {grpc_startup_errors[0]}")
         else:
-            logger.warning("gRPC server thread failed to start")
+            logger.info("✓ gRPC server started successfully")
     else:
         logger.info("gRPC server is disabled via GRPC_ENABLED environment variable")
 
@@ -1,7 +1,12 @@
 """
 代码生成路由
+
+CodegenService 基于 psycopg2（同步阻塞），路由中通过 asyncio.to_thread
+在线程池中调用，避免阻塞事件循环
 """
-from fastapi import APIRouter, HTTPException
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Request
 from typing import Optional
 
 from schemas.codegen import (
@@ -14,14 +19,17 @@ from services.codegen_service import CodegenService
 
 router = APIRouter(prefix="/api/codegen", tags=["代码生成"])
 
-codegen_service = CodegenService()
+
+async def get_codegen_service(request: Request) -> CodegenService:
+    """获取应用启动时创建的 CodegenService（见 main.lifespan）"""
+    return request.app.state.codegen_service
 
 
 @router.get("/health", response_model=HealthResponse, summary="代码生成服务健康检查")
-async def health_check():
+async def health_check(codegen_service: CodegenService = Depends(get_codegen_service)):
     """检查代码生成服务健康状态"""
     try:
-        db_connected = codegen_service.check_database_connection()
+        db_connected = await asyncio.to_thread(codegen_service.check_database_connection)
         return HealthResponse(
             status="healthy" if db_connected else "unhealthy",
             database_connected=db_connected
@@ -31,46 +39,54 @@ async def health_check():
 
 
 @router.get("/database", response_model=DatabaseInfoResponse, summary="获取数据库信息")
-async def get_database_info():
+async def get_database_info(codegen_service: CodegenService = Depends(get_codegen_service)):
     """获取数据库连接信息"""
     try:
-        info = codegen_service.get_database_info()
+        info = await asyncio.to_thread(codegen_service.get_database_info)
         return DatabaseInfoResponse(**info)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/tables", response_model=TableListResponse, summary="列出数据库表")
-async def list_tables(prefix: Optional[str] = ""):
+async def list_tables(
+    prefix: Optional[str] = "",
+    codegen_service: CodegenService = Depends(get_codegen_service)
+):
     """
     列出数据库表
 
     - prefix: 表名前缀过滤，例如 "sys" 只显示以 "sys" 开头的表
     """
     try:
-        tables = codegen_service.list_tables(prefix=prefix)
+        tables = await asyncio.to_thread(codegen_service.list_tables, prefix=prefix)
         return TableListResponse(
             count=len(tables),
             tables=tables
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/generate", response_model=CodeGenResponse, summary="生成所有表的代码")
-async def generate_all_code():
+async def generate_all_code(codegen_service: CodegenService = Depends(get_codegen_service)):
     """
     为配置中的所有表生成 Java 代码
     """
     try:
-        result = codegen_service.generate_all()
+        result = await asyncio.to_thread(codegen_service.generate_all)
         return CodeGenResponse(**result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/generate", response_model=CodeGenResponse, summary="生成指定表的代码")
-async def generate_code(tables: list[str]):
+async def generate_code(
+    tables: list[str],
+    codegen_service: CodegenService = Depends(get_codegen_service)
+):
     """
     为指定的表生成 Java 代码
 
@@ -80,7 +96,7 @@ async def generate_code(tables: list[str]):
         if not tables:
             raise HTTPException(status_code=400, detail="表名列表不能为空")
 
-        result = codegen_service.generate_tables(tables)
+        result = await asyncio.to_thread(codegen_service.generate_tables, tables)
         return CodeGenResponse(**result)
     except HTTPException:
         raise
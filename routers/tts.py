@@ -1,20 +1,27 @@
 """
 文本转语音路由
 """
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import Response
-from pydantic import BaseModel
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 
 from schemas.tts import TTSRequest, TTSResponse, HealthResponse
 from services.tts_service import TTSService
 
 router = APIRouter(prefix="/api/tts", tags=["文本转语音"])
 
-tts_service = TTSService()
+# 合成音频的格式：16 位、24kHz、单声道 PCM
+PCM_MEDIA_TYPE = "audio/L16;rate=24000;channels=1"
+
+
+async def get_tts_service(request: Request) -> TTSService:
+    """获取应用启动时创建的 TTSService（见 main.lifespan）"""
+    return request.app.state.tts_service
 
 
 @router.get("/health", response_model=HealthResponse, summary="TTS服务健康检查")
-async def health_check():
+async def health_check(tts_service: TTSService = Depends(get_tts_service)):
     """检查 TTS 服务健康状态"""
     try:
         api_configured = tts_service.check_api_key()
@@ -27,7 +34,10 @@ async def health_check():
 
 
 @router.post("/speak", response_model=TTSResponse, summary="生成语音（JSON返回）")
-async def generate_speech(request: TTSRequest):
+async def generate_speech(
+    request: TTSRequest,
+    tts_service: TTSService = Depends(get_tts_service)
+):
     """
     生成语音并返回 JSON 格式的响应
 
@@ -37,21 +47,20 @@ async def generate_speech(request: TTSRequest):
     - volume: 音量（0.1-1.0）
     """
     try:
-        result = tts_service.generate_speech(
-            text=request.text,
-            voice=request.voice,
-            speed=request.speed,
-            volume=request.volume
-        )
+        # generate_speech 会同步调用 TTS API，放到线程池中执行
+        result = await asyncio.to_thread(tts_service.generate_speech, request)
         return TTSResponse(**result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/generate", summary="生成语音（文件下载）")
-async def generate_speech_file(request: TTSRequest):
+async def generate_speech_file(
+    request: TTSRequest,
+    tts_service: TTSService = Depends(get_tts_service)
+):
     """
-    生成语音并直接返回音频文件
+    生成语音并以流的形式返回音频文件（边合成边传输，总长度未知，不设置 Content-Length）
 
     - text: 要转换的文本
     - voice: 发音人（female/male）
@@ -59,20 +68,13 @@ async def generate_speech_file(request: TTSRequest):
     - volume: 音量（0.1-1.0）
     """
     try:
-        audio_data = tts_service.generate_speech_bytes(
-            text=request.text,
-            voice=request.voice,
-            speed=request.speed,
-            volume=request.volume
-        )
+        audio_stream = tts_service.stream_speech(request)
 
-        return Response(
-            content=audio_data,
-            media_type="application/octet-stream",
-            headers={
-                "Content-Disposition": "attachment; filename=audio.pcm",
-                "Content-Length": str(len(audio_data))
-            }
+        return StreamingResponse(
+            audio_stream,
+            # 16 位单声道 PCM；audio/* 类型默认不会被 GZip 中间件压缩（PCM 压缩效果很差）
+            media_type=PCM_MEDIA_TYPE,
+            headers={"Content-Disposition": "attachment; filename=audio.pcm"}
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
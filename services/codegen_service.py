@@ -2,43 +2,137 @@
 代码生成服务
 """
 import os
-import psycopg2
+import re
+import functools
+import time
+import threading
+from types import MappingProxyType
+from typing import Mapping, Optional, Tuple
+
+from cachetools import TTLCache
 from dotenv import load_dotenv
 import yaml
 
+from db_pool import ConnectionPool
+
 # 加载环境变量
 load_dotenv()
 
 
+@functools.lru_cache(maxsize=1)
+def _load_db_config() -> dict:
+    """从环境变量读取数据库配置（进程内只读取一次）"""
+    return {
+        "host": os.getenv("DB_HOST"),
+        "port": os.getenv("DB_PORT"),
+        "database": os.getenv("DB_NAME"),
+        "user": os.getenv("DB_USER"),
+        "password": os.getenv("DB_PASSWORD"),
+        # 便于在 pg_stat_activity 和服务端日志中识别连接来源
+        "application_name": "lifehub-codegen"
+    }
+
+
+# 合法的表名前缀：只允许字母、数字和下划线
+_PREFIX_RE = re.compile(r"[A-Za-z0-9_]{0,64}")
+
+
+def _prefix_pattern(prefix: str) -> str:
+    """
+    校验表名前缀并转换为 LIKE 模式
+
+    Raises:
+        ValueError: 前缀包含非法字符或过长
+    """
+    if not _PREFIX_RE.fullmatch(prefix):
+        raise ValueError(f"无效的表名前缀: {prefix!r}")
+    # 下划线在 LIKE 中是单字符通配符，需要转义为字面量
+    return prefix.replace("_", "\\_") + "%"
+
+
+@functools.lru_cache(maxsize=1)
+def _load_generate_config() -> Mapping:
+    """读取 Generate/config.yaml（进程内只解析一次，返回只读映射）"""
+    config_path = os.path.join(os.path.dirname(__file__), "../Generate/config.yaml")
+    if os.path.exists(config_path):
+        with open(config_path, 'r', encoding='utf-8') as f:
+            config = yaml.safe_load(f) or {}
+    else:
+        config = {
+            "module_name": "sys",
+            "table_name": ["sys"],
+            "allowed_tables": False
+        }
+    return MappingProxyType(config)
+
+
+# 服务端预编译语句（名称 -> PREPARE 语句），交给 ConnectionPool 执行
+_PREPARED_STATEMENTS = {
+    # 直接查询 pg_catalog，避免 information_schema.tables 视图的多表关联和权限过滤
+    # relkind 'r' / 'p' 分别为普通表和分区表（即 information_schema 中的 BASE TABLE）
+    "codegen_list_tables": """
+        PREPARE codegen_list_tables (text) AS
+        SELECT c.relname
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = 'public'
+        AND c.relkind IN ('r', 'p')
+        AND c.relname LIKE $1
+        ORDER BY c.relname COLLATE "C"
+    """,
+}
+
+
 class CodegenService:
     """代码生成服务"""
 
+    # 连接池最大连接数
+    POOL_MAX_CONNECTIONS = int(os.getenv("DB_POOL_MAX", 10))
+
+    # 表列表缓存容量与过期时间（秒），表结构很少变化
+    TABLES_CACHE_MAX_SIZE = 64
+    TABLES_CACHE_TTL = 30
+
+    # 数据库健康检查结果的复用时间（秒），避免负载均衡器频繁探测时每次都访问数据库
+    HEALTH_CACHE_TTL = 5.0
+
     def __init__(self):
-        self.db_config = {
-            "host": os.getenv("DB_HOST"),
-            "port": os.getenv("DB_PORT"),
-            "database": os.getenv("DB_NAME"),
-            "user": os.getenv("DB_USER"),
-            "password": os.getenv("DB_PASSWORD")
-        }
+        self.db_config = dict(_load_db_config())
 
-        # 加载配置文件
-        config_path = os.path.join(os.path.dirname(__file__), "../Generate/config.yaml")
-        if os.path.exists(config_path):
-            with open(config_path, 'r', encoding='utf-8') as f:
-                self.config = yaml.safe_load(f)
-        else:
-            self.config = {
-                "module_name": "sys",
-                "table_name": ["sys"],
-                "allowed_tables": False
-            }
+        # 连接在首次访问数据库时建立，数据库不可用时也能正常创建服务
+        self._db = ConnectionPool(self.db_config, self.POOL_MAX_CONNECTIONS, _PREPARED_STATEMENTS)
+
+        # 按前缀缓存的表列表
+        self._tables_cache = TTLCache(maxsize=self.TABLES_CACHE_MAX_SIZE, ttl=self.TABLES_CACHE_TTL)
+        self._tables_cache_lock = threading.Lock()
+
+        # 最近一次数据库健康检查结果: (是否可用, 过期时间)
+        self._db_health: Optional[Tuple[bool, float]] = None
+
+        # 代码生成配置（所有实例共享同一份只读配置）
+        self.config = _load_generate_config()
+
+    def close(self):
+        """关闭连接池中的所有连接"""
+        self._db.close()
 
     def check_database_connection(self) -> bool:
-        """检查数据库连接"""
+        """检查数据库连接（结果缓存 HEALTH_CACHE_TTL 秒）"""
+        now = time.monotonic()
+        cached = self._db_health
+        if cached is not None and cached[1] > now:
+            return cached[0]
+
+        connected = self._ping_database()
+        self._db_health = (connected, now + self.HEALTH_CACHE_TTL)
+        return connected
+
+    def _ping_database(self) -> bool:
+        """实际访问数据库确认连接可用"""
         try:
-            conn = psycopg2.connect(**self.db_config)
-            conn.close()
+            # 池中的连接可能已被服务端断开，执行一条查询确认可用
+            with self._db.cursor() as cursor:
+                cursor.execute("SELECT 1")
             return True
         except Exception:
             return False
@@ -46,14 +140,9 @@ class CodegenService:
     def get_database_info(self) -> dict:
         """获取数据库信息"""
         try:
-            conn = psycopg2.connect(**self.db_config)
-            cursor = conn.cursor()
-
-            cursor.execute("SELECT version()")
-            version = cursor.fetchone()[0]
-
-            cursor.close()
-            conn.close()
+            with self._db.cursor() as cursor:
+                cursor.execute("SELECT version()")
+                version = cursor.fetchone()[0]
 
             return {
                 "host": self.db_config["host"],
@@ -74,44 +163,64 @@ class CodegenService:
             }
 
     def list_tables(self, prefix: str = "") -> list[str]:
-        """列出数据库表"""
-        try:
-            conn = psycopg2.connect(**self.db_config)
-            cursor = conn.cursor()
-
-            query = """
-                SELECT table_name
-                FROM information_schema.tables
-                WHERE table_schema = 'public'
-                AND table_type = 'BASE TABLE'
-            """
+        """
+        列出数据库表（结果按前缀缓存 TABLES_CACHE_TTL 秒）
 
-            if prefix:
-                query += f" AND table_name LIKE %s"
-                cursor.execute(query, (f"{prefix}%",))
-            else:
-                cursor.execute(query)
+        Raises:
+            ValueError: 前缀不合法
+        """
+        pattern = _prefix_pattern(prefix)
 
-            tables = [row[0] for row in cursor.fetchall()]
+        with self._tables_cache_lock:
+            cached = self._tables_cache.get(prefix)
+        if cached is not None:
+            return list(cached)
 
-            cursor.close()
-            conn.close()
-
-            return sorted(tables)
+        try:
+            with self._db.cursor() as cursor:
+                # 前缀为空时 '%' 匹配所有表
+                self._db.execute_prepared(cursor, "codegen_list_tables", (pattern,))
+                tables = [row[0] for row in cursor.fetchall()]
         except Exception as e:
             raise Exception(f"获取表列表失败: {str(e)}")
 
+        with self._tables_cache_lock:
+            self._tables_cache[prefix] = tuple(tables)
+        return tables
+
+    def _list_tables_matching(self, prefixes: list[str]) -> list[str]:
+        """一次查询列出匹配任意前缀的表（去重并排序）"""
+        patterns = [_prefix_pattern(prefix) for prefix in prefixes]
+
+        with self._db.cursor() as cursor:
+            # 每个表只会出现一次，前缀重叠也无需 DISTINCT
+            cursor.execute(
+                """
+                SELECT c.relname
+                FROM pg_class c
+                JOIN pg_namespace n ON n.oid = c.relnamespace
+                WHERE n.nspname = 'public'
+                AND c.relkind IN ('r', 'p')
+                AND c.relname LIKE ANY(%s)
+                ORDER BY c.relname COLLATE "C"
+                """,
+                (patterns,)
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def invalidate_tables_cache(self):
+        """清除表列表缓存（新建或删除表后调用）"""
+        with self._tables_cache_lock:
+            self._tables_cache.clear()
+
     def generate_all(self) -> dict:
         """生成所有配置的表的代码"""
         try:
             # 获取表名前缀
             table_filters = self.config.get("table_name", ["sys"])
 
-            # 收集所有匹配的表
-            all_tables = []
-            for prefix in table_filters:
-                tables = self.list_tables(prefix=prefix)
-                all_tables.extend(tables)
+            # 一次查询收集所有匹配的表
+            all_tables = self._list_tables_matching(table_filters) if table_filters else []
 
             if not all_tables:
                 return {
@@ -2,11 +2,55 @@
 文本转语音服务
 """
 import os
+import re
+import asyncio
+from typing import AsyncIterator
 from dotenv import load_dotenv
 
+from schemas.tts import TTSRequest
+
 # 加载环境变量
 load_dotenv()
 
+# 以这些缩写结尾的句点不视为句子结束
+_ABBREVIATIONS = ("Mr", "Mrs", "Ms", "Dr", "Prof", "St", "e.g", "i.e", "etc", "vs")
+
+# 句末标点（连续的标点视为一个句子结束）及其后的空白，导入时编译一次：
+# - 中文句末标点直接切分
+# - 英文句末标点前不能是缩写（定长反向断言），后面不能紧跟字母或数字（排除 3.14、e.g 中间的句点）
+_SENT_RE = re.compile(
+    r"(?:[。！？]+|"
+    + "".join(rf"(?<!\b{re.escape(abbreviation)})" for abbreviation in _ABBREVIATIONS)
+    + r"[.!?]+(?![A-Za-z0-9]))\s*"
+)
+
+# 流式合成时预先合成的句子数
+PREFETCH_SEGMENTS = 2
+
+
+def split_sentences(text: str) -> list[str]:
+    """
+    按句末标点将文本切分为句子，用于分段合成语音
+
+    Args:
+        text: 要切分的文本
+
+    Returns:
+        句子列表（去除首尾空白）
+    """
+    sentences = []
+    start = 0
+    for match in _SENT_RE.finditer(text):
+        sentence = text[start:match.end()].strip()
+        if sentence:
+            sentences.append(sentence)
+        start = match.end()
+
+    tail = text[start:].strip()
+    if tail:
+        sentences.append(tail)
+    return sentences
+
 
 class TTSService:
     """文本转语音服务（使用 Zhipu AI GLM-TTS）"""
@@ -18,18 +62,20 @@ class TTSService:
         """检查 API 密钥是否配置"""
         return bool(self.api_key)
 
-    def generate_speech(self, text: str, voice: str = "female",
-                       speed: float = 1.0, volume: float = 1.0) -> dict:
+    def generate_speech(self, request: TTSRequest) -> dict:
         """
         生成语音
 
         返回 JSON 格式的响应
+
+        Args:
+            request: 已由 FastAPI 校验过的请求，直接使用其字段，不再重复校验
         """
         try:
             # TODO: 实际调用 Zhipu AI TTS API
             # from zhipuai import ZhipuAI
             # client = ZhipuAI(api_key=self.api_key)
-            # response = client.audio.speech.create(...)
+            # response = client.audio.speech.create(**request.model_dump(mode="python"))
 
             # 占位符实现
             return {
@@ -47,13 +93,52 @@ class TTSService:
                 "format": "pcm"
             }
 
-    def generate_speech_bytes(self, text: str, voice: str = "female",
-                             speed: float = 1.0, volume: float = 1.0) -> bytes:
+    def generate_speech_bytes(self, request: TTSRequest) -> bytes:
         """
         生成语音
 
         返回音频二进制数据
+
+        Args:
+            request: 已由 FastAPI 校验过的请求
         """
         # TODO: 实际调用 Zhipu AI TTS API 并返回音频数据
         # 占位符实现
         return b""
+
+    async def stream_speech(self, request: TTSRequest) -> AsyncIterator[bytes]:
+        """
+        流式生成语音
+
+        文本按句子切分后逐句合成，返回当前句音频的同时在后台合成后续句子
+        （最多预先合成 PREFETCH_SEGMENTS 句），客户端只需等待第一句合成完成即可开始播放
+        """
+        segments = split_sentences(request.text)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=PREFETCH_SEGMENTS)
+        done = object()
+
+        async def synthesize():
+            try:
+                for segment in segments:
+                    # model_copy 不会重新执行校验
+                    segment_request = request.model_copy(update={"text": segment})
+                    audio_data = await asyncio.to_thread(self.generate_speech_bytes, segment_request)
+                    await queue.put(audio_data)
+                await queue.put(done)
+            except Exception as e:
+                await queue.put(e)
+
+        producer = asyncio.create_task(synthesize())
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                if item:
+                    yield item
+        finally:
+            # 客户端断开或出错时停止后续合成
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
@@ -2,33 +2,24 @@
 
 import sys
 import time
-from pathlib import Path
 
 import grpc
 
-# Add project root to path
-project_root = Path(__file__).parent
-sys.path.insert(0, str(project_root))
-
 from generated import health_pb2, health_pb2_grpc
 
 
-def test_health_check(host: str = "localhost", port: int = 50051):
+def test_health_check(stub: health_pb2_grpc.HealthStub):
     """Test overall health check endpoint."""
     print(f"\n{'='*60}")
     print("Testing Overall Health Check")
     print(f"{'='*60}")
 
     try:
-        # Create channel
-        channel = grpc.insecure_channel(f"{host}:{port}")
-        stub = health_pb2_grpc.HealthStub(channel)
-
         # Create request
         request = health_pb2.Empty()
 
         # Make RPC call
-        print(f"Calling Health.Check() on {host}:{port}...")
+        print("Calling Health.Check()...")
         response = stub.Check(request)
 
         # Display response
@@ -36,7 +27,6 @@ def test_health_check(host: str = "localhost", port: int = 50051):
         print(f"✓ Version: {response.version}")
         print(f"✓ Timestamp: {response.timestamp} ({time.ctime(response.timestamp)})")
 
-        channel.close()
         return True
 
     except grpc.RpcError as e:
@@ -49,17 +39,13 @@ def test_health_check(host: str = "localhost", port: int = 50051):
         return False
 
 
-def test_service_health_check(service_name: str, host: str = "localhost", port: int = 50051):
+def test_service_health_check(stub: health_pb2_grpc.HealthStub, service_name: str):
     """Test service-specific health check endpoint."""
     print(f"\n{'='*60}")
     print(f"Testing {service_name.upper()} Service Health Check")
     print(f"{'='*60}")
 
     try:
-        # Create channel
-        channel = grpc.insecure_channel(f"{host}:{port}")
-        stub = health_pb2_grpc.HealthStub(channel)
-
         # Create request
         request = health_pb2.ServiceRequest(service_name=service_name)
 
@@ -72,7 +58,6 @@ def test_service_health_check(service_name: str, host: str = "localhost", port:
         print(f"✓ Database Connected: {response.database_connected}")
         print(f"✓ Message: {response.message}")
 
-        channel.close()
         return True
 
     except grpc.RpcError as e:
@@ -94,26 +79,31 @@ def main():
     host = "localhost"
     port = 50051
 
-    # Test 1: Overall health check
-    success1 = test_health_check(host, port)
+    # One channel (one HTTP/2 connection) shared by every RPC below
+    print(f"Connecting to {host}:{port}...")
+    with grpc.insecure_channel(f"{host}:{port}") as channel:
+        stub = health_pb2_grpc.HealthStub(channel)
 
-    # Test 2: Code generation service health check
-    success2 = test_service_health_check("code_generation", host, port)
+        # Test 1: Overall health check
+        success1 = test_health_check(stub)
 
-    # Test 3: TTS service health check
-    success3 = test_service_health_check("tts", host, port)
+        # Test 2: Code generation service health check
+        success2 = test_service_health_check(stub, "code_generation")
 
-    # Test 4: Database service health check
-    success4 = test_service_health_check("database", host, port)
+        # Test 3: TTS service health check
+        success3 = test_service_health_check(stub, "tts")
 
-    # Test 5: Invalid service (should return NOT_FOUND error)
-    print(f"\n{'='*60}")
-    print("Testing Invalid Service (Error Handling)")
-    print(f"{'='*60}")
-    print(f"Calling Health.CheckService(service_name='invalid_service')...")
-    success5 = not test_service_health_check("invalid_service", host, port)
-    if success5:
-        print("✓ Error handling works correctly")
+        # Test 4: Database service health check
+        success4 = test_service_health_check(stub, "database")
+
+        # Test 5: Invalid service (should return NOT_FOUND error)
+        print(f"\n{'='*60}")
+        print("Testing Invalid Service (Error Handling)")
+        print(f"{'='*60}")
+        print("Calling Health.CheckService(service_name='invalid_service')...")
+        success5 = not test_service_health_check(stub, "invalid_service")
+        if success5:
+            print("✓ Error handling works correctly")
 
     # Summary
     print(f"\n{'='*60}")